@@ -0,0 +1,116 @@
+# src/_llm_cache.py
+
+import hashlib
+import os
+
+import orjson
+
+from ._openai_client import get_client  # type: ignore[import]
+from ._retry import create_chat_completion  # type: ignore[import]
+
+
+def _interim_dir(doc_id: str) -> str:
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.abspath(os.path.join(current_dir, ".."))
+    return os.path.join(project_root, "data", "interim", str(doc_id))
+
+
+def prompt_hash(model: str, system_prompt: str, prompt: str) -> str:
+    """
+    Short, stable hash of everything that determines the LLM response.
+    """
+    key = "\x00".join([model, system_prompt, prompt])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def llm_cache_path(
+    doc_id: str,
+    page_id: int,
+    stage: str,
+    model: str,
+    system_prompt: str,
+    prompt: str,
+) -> str:
+    """
+    Cache location for one LLM response:
+        data/interim/{doc_id}/{stage}/{page_id}_{hash}.json
+
+    The hash covers model + prompts, so editing a prompt template or
+    changing the model naturally misses the old entries.
+    """
+    d = os.path.join(_interim_dir(doc_id), stage)
+    key = prompt_hash(model, system_prompt, prompt)
+    return os.path.join(d, f"{page_id}_{key}.json")
+
+
+def json_chat_request(prompt: str, model: str, system_prompt: str) -> dict:
+    """
+    Keyword arguments for a JSON-mode chat.completions.create() call.
+    Also used as the request body for the Batch API (see openai_batch).
+    """
+    return {
+        "model": model,
+        "messages": [
+            {
+                "role": "system",
+                "content": system_prompt,
+            },
+            {
+                "role": "user",
+                "content": prompt,
+            },
+        ],
+        "response_format": {"type": "json_object"},
+        "temperature": 0,
+    }
+
+
+def store_cached_json(cache_path: str, content: str) -> None:
+    """
+    Validate a JSON response and write it to cache_path atomically
+    (temp file + os.replace). Raises on malformed JSON, before anything
+    is written.
+    """
+    data = orjson.loads(content)
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(orjson.dumps(data))
+    os.replace(tmp_path, cache_path)
+
+
+def cached_chat_json(
+    prompt: str,
+    model: str,
+    cache_path: str,
+    system_prompt: str,
+    stage: str,
+) -> str:
+    """
+    Return the JSON-mode chat response for (system_prompt, prompt), reading
+    it from cache_path when present.
+
+    On a cache miss the API is called and the response is written to a temp
+    file and os.replace()d into place, so the cache never holds a partial
+    file. Responses that are empty or not valid JSON are not cached.
+    """
+    if os.path.exists(cache_path):
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    client = get_client()
+
+    response = create_chat_completion(
+        client,
+        stage=stage,
+        **json_chat_request(prompt, model, system_prompt),
+    )
+
+    content = response.choices[0].message.content
+    if content is None:
+        raise RuntimeError("LLM returned empty content.")
+
+    store_cached_json(cache_path, content)
+
+    return content
@@ -0,0 +1,66 @@
+# src/_openai_client.py
+
+import functools
+import os
+
+import httpx
+from openai import AsyncOpenAI, OpenAI  # requires 'openai' package installed
+
+from .utils import load_env  # type: ignore[import]
+
+_POOL_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+# The SDK's own retries are disabled: _retry.retry_llm is the only retry
+# layer, so every attempt goes through the rate limiter and one backoff
+# schedule instead of nesting 3 SDK tries inside each retry_llm attempt.
+
+
+@functools.lru_cache(maxsize=1)
+def get_client() -> OpenAI:
+    """
+    Process-wide OpenAI client.
+
+    Reusing one client keeps its HTTP connection pool alive, so consecutive
+    calls skip the TCP + TLS handshake. HTTP/2 lets concurrent requests
+    share a connection instead of opening one socket each.
+    """
+    # Ensure environment variables (OPENAI_API_KEY) are loaded
+    load_env()
+    return OpenAI(
+        max_retries=0,
+        http_client=httpx.Client(http2=True, limits=_POOL_LIMITS, timeout=_TIMEOUT),
+    )
+
+
+def new_async_client() -> AsyncOpenAI:
+    """
+    New AsyncOpenAI client, to be owned (and closed) by the coroutine that
+    uses it:
+
+        async with new_async_client() as client:
+            ...
+
+    Async connections belong to the event loop that opened them, and every
+    asyncio.run() starts a new loop, so async clients are not cached per
+    process like get_client(). A client left open after its loop closes
+    keeps its keep-alive sockets (and the loop) alive.
+    """
+    load_env()
+    return AsyncOpenAI(
+        max_retries=0,
+        http_client=httpx.AsyncClient(
+            http2=True,
+            limits=_POOL_LIMITS,
+            timeout=_TIMEOUT,
+        ),
+    )
+
+
+# A forked worker (see batch.process_all_pdfs_to_excel) must not reuse the
+# parent's open sockets, so drop the cached client in the child.
+if hasattr(os, "register_at_fork"):
+    def _reset_clients_after_fork() -> None:
+        get_client.cache_clear()
+
+    os.register_at_fork(after_in_child=_reset_clients_after_fork)
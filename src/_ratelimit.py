@@ -0,0 +1,160 @@
+# src/_ratelimit.py
+
+import contextlib
+import contextvars
+import threading
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+from aiolimiter import AsyncLimiter
+
+# Requests per second allowed for each pipeline stage in THIS process.
+# The combined classify + extract call draws on the "extract" budget.
+_RPS: Dict[str, float] = {
+    "ocr": 8.0,
+    "classify": 8.0,
+    "extract": 8.0,
+}
+_STAGE_BUDGET = {"combined": "extract"}
+
+_lock = threading.Lock()
+_sync_limiters: Dict[str, "_SyncLimiter"] = {}
+# Async limiters of the current async_rate_limit_scope(), if any; outside
+# a scope, _async_limiters is used.
+_scoped_async_limiters: "contextvars.ContextVar[Optional[Dict[str, AsyncLimiter]]]" = (
+    contextvars.ContextVar("_scoped_async_limiters", default=None)
+)
+_async_limiters: Dict[str, AsyncLimiter] = {}
+
+
+def _bucket(rps: float) -> Tuple[float, float]:
+    """
+    (max_rate, time_period) for a leaky bucket releasing `rps` requests per
+    second. The bucket holds at least one request, so rates below 1/s
+    (e.g. an account budget split over many workers) still work.
+    """
+    max_rate = max(1.0, rps)
+    return max_rate, max_rate / rps
+
+
+class _SyncLimiter:
+    """
+    Thread-safe leaky bucket with the same semantics as aiolimiter's
+    AsyncLimiter, for the blocking classify / extract calls.
+    """
+
+    def __init__(self, rps: float) -> None:
+        self._max_rate, time_period = _bucket(rps)
+        self._leak_per_sec = self._max_rate / time_period
+        self._level = 0.0
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._level = max(
+                    0.0, self._level - (now - self._last) * self._leak_per_sec
+                )
+                self._last = now
+                if self._level + 1 <= self._max_rate:
+                    self._level += 1
+                    return
+                wait = (self._level + 1 - self._max_rate) / self._leak_per_sec
+            time.sleep(wait)
+
+
+def _budget(stage: str) -> str:
+    budget = _STAGE_BUDGET.get(stage, stage)
+    if budget not in _RPS:
+        raise ValueError(f"Unknown rate-limit stage: {stage!r}")
+    return budget
+
+
+def configure_rate_limits(
+    rps_ocr: Optional[float] = None,
+    rps_classify: Optional[float] = None,
+    rps_extract: Optional[float] = None,
+) -> None:
+    """
+    Set the per-process request rate for each stage (None keeps the current
+    value). Existing limiters are discarded so the new rates apply at once.
+
+    When several worker processes call the API, give each of them a share
+    of the account limit so that the sum stays under it (see
+    batch.process_all_pdfs_to_excel).
+    """
+    with _lock:
+        for stage, rps in (
+            ("ocr", rps_ocr),
+            ("classify", rps_classify),
+            ("extract", rps_extract),
+        ):
+            if rps is None:
+                continue
+            if rps <= 0:
+                raise ValueError(f"rps for {stage!r} must be positive, got {rps}")
+            _RPS[stage] = float(rps)
+
+        _sync_limiters.clear()
+        _async_limiters.clear()
+
+
+def get_rate_limits() -> Dict[str, float]:
+    """
+    Current per-process requests-per-second budget of each stage.
+    """
+    with _lock:
+        return dict(_RPS)
+
+
+def acquire(stage: str) -> None:
+    """
+    Block until the stage's budget allows one more request.
+    """
+    budget = _budget(stage)
+    with _lock:
+        limiter = _sync_limiters.get(budget)
+        if limiter is None:
+            limiter = _SyncLimiter(_RPS[budget])
+            _sync_limiters[budget] = limiter
+    limiter.acquire()
+
+
+@contextlib.contextmanager
+def async_rate_limit_scope() -> Iterator[None]:
+    """
+    Give the coroutines started inside this block (e.g. one asyncio.run()
+    worth of OCR requests) their own set of async limiters, dropped when
+    the block exits.
+
+    An AsyncLimiter binds to the event loop that first uses it, so limiters
+    kept for the whole process would outlive every closed loop; scoping
+    them to one run avoids that.
+    """
+    token = _scoped_async_limiters.set({})
+    try:
+        yield
+    finally:
+        _scoped_async_limiters.reset(token)
+
+
+async def acquire_async(stage: str) -> None:
+    """
+    Wait until the stage's budget allows one more request.
+
+    All coroutines in the same async_rate_limit_scope() share one bucket per
+    budget. Outside a scope, one process-wide bucket per budget is used
+    (aiolimiter rebinds it when a new event loop starts).
+    """
+    budget = _budget(stage)
+    with _lock:
+        limiters = _scoped_async_limiters.get()
+        if limiters is None:
+            limiters = _async_limiters
+        limiter = limiters.get(budget)
+        if limiter is None:
+            limiter = AsyncLimiter(*_bucket(_RPS[budget]))
+            limiters[budget] = limiter
+    await limiter.acquire()
@@ -0,0 +1,135 @@
+# src/_retry.py
+
+import asyncio
+import functools
+import inspect
+import random
+import time
+from typing import Any, Callable, Optional, TypeVar
+
+import openai
+
+from ._ratelimit import acquire, acquire_async  # type: ignore[import]
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """
+    Transient errors worth retrying: rate limits, connection problems,
+    timeouts and 5xx responses. Anything else (bad request, auth, ...)
+    fails immediately.
+    """
+    if isinstance(
+        exc,
+        (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError),
+    ):
+        return True
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code >= 500
+    return False
+
+
+def _retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """
+    Read the Retry-After header (in seconds) from the error response, if any.
+    """
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    value = response.headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def _backoff_delay(
+    exc: BaseException,
+    attempt: int,
+    base: float,
+    cap: float,
+) -> float:
+    retry_after = _retry_after_seconds(exc)
+    if retry_after is not None:
+        return min(cap, retry_after)
+    return min(cap, base * 2**attempt) + random.uniform(0, 0.5)
+
+
+def retry_llm(
+    max_attempts: int = 5,
+    base: float = 1.0,
+    cap: float = 30.0,
+) -> Callable[[F], F]:
+    """
+    Retry an OpenAI call on transient errors with exponential backoff.
+
+    The delay before retry n (0-based) is min(cap, base * 2**n) plus a
+    little jitter, unless the server sent a Retry-After header. Works on
+    both plain functions and coroutine functions. After max_attempts the
+    last error is re-raised to the caller.
+    """
+
+    def decorator(func: F) -> F:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                for attempt in range(max_attempts):
+                    try:
+                        return await func(*args, **kwargs)
+                    except Exception as e:
+                        if attempt == max_attempts - 1 or not _is_retryable(e):
+                            raise
+                        delay = _backoff_delay(e, attempt, base, cap)
+                        print(f"[retry] {type(e).__name__}, retrying in {delay:.1f}s")
+                        await asyncio.sleep(delay)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            for attempt in range(max_attempts):
+                try:
+                    return func(*args, **kwargs)
+                except Exception as e:
+                    if attempt == max_attempts - 1 or not _is_retryable(e):
+                        raise
+                    delay = _backoff_delay(e, attempt, base, cap)
+                    print(f"[retry] {type(e).__name__}, retrying in {delay:.1f}s")
+                    time.sleep(delay)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+@retry_llm()
+def create_chat_completion(
+    client: "openai.OpenAI",
+    stage: str,
+    **kwargs: Any,
+) -> Any:
+    """
+    client.chat.completions.create(**kwargs), retried on transient errors.
+
+    Every attempt first waits for the rate limiter of `stage`
+    ("ocr", "classify", "extract" or "combined").
+    """
+    acquire(stage)
+    return client.chat.completions.create(**kwargs)
+
+
+@retry_llm()
+async def create_chat_completion_async(
+    client: "openai.AsyncOpenAI",
+    stage: str,
+    **kwargs: Any,
+) -> Any:
+    """
+    Async variant of create_chat_completion().
+    """
+    await acquire_async(stage)
+    return await client.chat.completions.create(**kwargs)
@@ -1,16 +1,32 @@
 # src/batch.py
 
+import asyncio
+import contextlib
+import functools
+import hashlib
 import os
 import glob
-from typing import List, Dict, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Dict, Optional, Tuple
 
-import pandas as pd
+import xlsxwriter
 
-from .ocr import ocr_page_with_gpt  # type: ignore[import]
+from .ocr import ocr_page_with_gpt_async  # type: ignore[import]
+from ._openai_client import new_async_client  # type: ignore[import]
 from .loader import export_pdf_pages_as_images  # type: ignore[import]
-from .pipeline import process_document  # type: ignore[import]
+from .pipeline import process_document_batch  # type: ignore[import]
+from .openai_batch import prefill_combined_cache_with_batch_api  # type: ignore[import]
+from ._ratelimit import async_rate_limit_scope, configure_rate_limits  # type: ignore[import]
+from .schema import LedgerRow, PageMetadata, PageRowsBatch  # type: ignore[import]
+from .utils import run_sync  # type: ignore[import]
 
 
+# Excel column order follows the schema definitions
+ROW_COLUMNS: List[str] = list(LedgerRow.__annotations__)
+META_COLUMNS: List[str] = list(PageMetadata.__annotations__)
+
+
+@functools.lru_cache(maxsize=1)
 def _project_root() -> str:
     return os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
@@ -34,47 +50,213 @@ def _ocr_cache_dir(doc_id: str) -> str:
     return d
 
 
+def _write_text_atomic(path: str, text: str) -> None:
+    """
+    Write text to a temp file and os.replace() it into place, so an
+    interrupted run never leaves a truncated cache file behind.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def _image_hash(image_path: str) -> str:
+    """
+    Short content hash of a page image, used as the OCR cache key.
+    """
+    with open(image_path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()[:16]
+
+
+async def _ocr_pages_async(
+    doc_id: str,
+    tasks: List[Tuple[int, str, str]],
+    model: str,
+    max_concurrency: int,
+) -> Dict[int, str]:
+    """
+    OCR the given (page_id, image_path, cache_path) triples concurrently.
+
+    At most `max_concurrency` requests are in flight; the request rate is
+    capped by the shared "ocr" limiter (see _ratelimit). Each page is
+    written to its cache_path as soon as its response arrives.
+
+    All pages share one AsyncOpenAI client and one set of rate limiters;
+    both are closed / dropped before the event loop ends, so nothing
+    outlives it.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    # Limiters and client both belong to this run's event loop
+    with async_rate_limit_scope():
+        async with new_async_client() as client:
+
+            async def _bounded(page_id: int, image_path: str, cache_path: str) -> Tuple[int, str]:
+                async with semaphore:
+                    print(f"[OCR] {doc_id} page {page_id} -> {image_path}")
+                    page_text = await ocr_page_with_gpt_async(
+                        image_path,
+                        model=model,
+                        client=client,
+                    )
+
+                _write_text_atomic(cache_path, page_text)
+                return page_id, page_text
+
+            results = await asyncio.gather(
+                *[_bounded(*task) for task in tasks]
+            )
+
+    return dict(results)
+
+
 def ocr_pdf_to_pages_cached(
     doc_id: str,
     model: str = "gpt-4o-mini",
+    max_concurrency: int = 16,
+    render_workers: int = 8,
 ) -> Dict[int, str]:
     """
     OCR all pages of a PDF, but cache each page's transcription to:
-        data/interim/{doc_id}/ocr_text/page_{page_id}.txt
+        data/interim/{doc_id}/ocr_text/page_{page_id}_{image_hash}.txt
 
-    If the txt exists, reuse it (no API call).
+    The cache is keyed by the content of the rendered page image, so if the
+    PDF in data/raw changes, the affected pages are OCR'd again instead of
+    silently reusing stale text.
+
+    If the txt exists, reuse it (no API call). Uncached pages are sent to
+    the OCR model concurrently, at most `max_concurrency` at once. The
+    request rate is set process-wide with _ratelimit.configure_rate_limits().
+    render_workers is the number of JPEG encoder threads used if the pages
+    have to be rendered (see loader.export_pdf_pages_as_images).
     """
-    page_images = export_pdf_pages_as_images(doc_id)
+    # Cheap when the images are already up to date (no PDF rendering)
+    page_images = export_pdf_pages_as_images(doc_id, max_workers=render_workers)
     cache_dir = _ocr_cache_dir(doc_id)
 
     pages_text: Dict[int, str] = {}
+    tasks: List[Tuple[int, str, str]] = []
 
     for page_id, image_path in sorted(page_images.items()):
-        cache_path = os.path.join(cache_dir, f"page_{page_id}.txt")
+        key = _image_hash(image_path)
+        cache_path = os.path.join(cache_dir, f"page_{page_id}_{key}.txt")
 
         if os.path.exists(cache_path):
             with open(cache_path, "r", encoding="utf-8") as f:
                 pages_text[page_id] = f.read()
             continue
 
-        print(f"[OCR] {doc_id} page {page_id} -> {image_path}")
-        page_text = ocr_page_with_gpt(image_path, model=model)
-        pages_text[page_id] = page_text
+        tasks.append((page_id, image_path, cache_path))
+
+    if tasks:
+        pages_text.update(
+            run_sync(
+                _ocr_pages_async(
+                    doc_id,
+                    tasks,
+                    model=model,
+                    max_concurrency=max_concurrency,
+                )
+            )
+        )
+
+    return dict(sorted(pages_text.items()))
+
+
+@contextlib.contextmanager
+def _doc_map(max_workers: int, per_worker_rps: Tuple[float, float, float]):
+    """
+    Yield a map() over documents: in-process for max_workers == 1, else
+    executor.map of a process pool. Each process is given its per-worker
+    share of the rate limits.
+    """
+    if max_workers == 1:
+        configure_rate_limits(*per_worker_rps)
+        yield map
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=configure_rate_limits,
+        initargs=per_worker_rps,
+    ) as executor:
+        yield executor.map
+
+
+def _write_records(
+    worksheet: "xlsxwriter.worksheet.Worksheet",
+    start_row: int,
+    records: Iterable[dict],
+    columns: List[str],
+) -> int:
+    """
+    Append dict records (in `columns` order) to worksheet, starting at
+    start_row. None becomes an empty cell. Returns the next free row.
+    """
+    row_idx = start_row
+    for record in records:
+        worksheet.write_row(row_idx, 0, [record.get(c) for c in columns])
+        row_idx += 1
 
-        with open(cache_path, "w", encoding="utf-8") as f:
-            f.write(page_text)
+    return row_idx
 
-    return pages_text
+
+def _process_one_doc(
+    doc_id: str,
+    model_ocr: str = "gpt-4o-mini",
+    render_workers: int = 8,
+) -> Tuple[List[PageMetadata], PageRowsBatch]:
+    """
+    Full pipeline for one PDF: images -> OCR (cached) -> classify/extract.
+
+    Lives at module scope so it can be pickled and run in a worker process.
+    """
+    print(f"\n=== Processing {doc_id} ===")
+
+    pages = ocr_pdf_to_pages_cached(
+        doc_id,
+        model=model_ocr,
+        render_workers=render_workers,
+    )
+
+    doc_meta, doc_rows = process_document_batch(doc_id, pages)
+
+    return doc_meta, doc_rows
 
 
 def process_all_pdfs_to_excel(
     output_excel_name: str = "all_years_rows.xlsx",
     model_ocr: str = "gpt-4o-mini",
+    max_workers: Optional[int] = None,
+    rps_ocr: float = 8.0,
+    rps_classify: float = 8.0,
+    rps_extract: float = 8.0,
+    use_batch_api: bool = False,
+    batch_poll_interval: float = 30.0,
 ) -> str:
     """
     Batch process all PDFs in data/raw/*.pdf:
       PDF -> images -> OCR (cached) -> LLM classify/extract -> rows
-    Then write a single Excel file with ALL rows.
+    Then write a single Excel file with ALL rows. Rows are streamed into the
+    workbook one document at a time instead of being held for the whole corpus.
+
+    Documents are processed in parallel worker processes (pdfplumber is not
+    thread-safe, and page rendering is CPU-bound):
+      - max_workers: number of processes (default: os.cpu_count());
+        1 processes documents sequentially in this process.
+
+    rps_ocr / rps_classify / rps_extract are the account-wide requests per
+    second for each stage (the combined classify + extract call counts
+    against rps_extract). Each worker gets an equal share, so all workers
+    together stay within these limits.
+
+    use_batch_api=True is meant for offline runs: all documents are OCR'd
+    first, then every uncached page's classify + extract call goes through
+    the OpenAI Batch API (about half the cost, up to 24h turnaround, polled
+    every `batch_poll_interval` seconds). The results land in the combined
+    LLM cache, so the normal pass below reads them from disk; pages the
+    batch could not answer fall back to synchronous calls.
 
     Returns:
       path to saved Excel file
@@ -83,32 +265,81 @@ def process_all_pdfs_to_excel(
     if not doc_ids:
         raise FileNotFoundError("No PDFs found in data/raw/*.pdf")
 
-    all_rows: List[dict] = []
-    all_pages_meta: List[dict] = []
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(doc_ids)))
 
-    for doc_id in doc_ids:
-        print(f"\n=== Processing {doc_id} ===")
+    root = _project_root()
+    out_dir = os.path.join(root, "data", "processed")
+    os.makedirs(out_dir, exist_ok=True)
+    out_path = os.path.join(out_dir, output_excel_name)
 
-        pages = ocr_pdf_to_pages_cached(doc_id, model=model_ocr)
+    # Split the CPU between worker processes and their JPEG encoder threads
+    # instead of giving every worker a full set of threads
+    render_workers = max(1, (os.cpu_count() or 1) // max_workers)
 
-        doc_meta, doc_rows = process_document(doc_id, pages)
+    process_one = functools.partial(
+        _process_one_doc,
+        model_ocr=model_ocr,
+        render_workers=render_workers,
+    )
 
-        all_pages_meta.extend(doc_meta)
-        all_rows.extend(doc_rows)
+    per_worker_rps = (
+        rps_ocr / max_workers,
+        rps_classify / max_workers,
+        rps_extract / max_workers,
+    )
 
-        print(f"Finished {doc_id}: pages={len(doc_meta)}, rows={len(doc_rows)}")
+    if use_batch_api:
+        ocr_one = functools.partial(
+            ocr_pdf_to_pages_cached,
+            model=model_ocr,
+            render_workers=render_workers,
+        )
+        with _doc_map(max_workers, per_worker_rps) as doc_map:
+            pages_by_doc = dict(zip(doc_ids, doc_map(ocr_one, doc_ids)))
 
-    df_rows = pd.DataFrame(all_rows)
-    df_meta = pd.DataFrame(all_pages_meta)
+        prefill_combined_cache_with_batch_api(
+            pages_by_doc,
+            poll_interval=batch_poll_interval,
+        )
+        del pages_by_doc
 
-    root = _project_root()
-    out_dir = os.path.join(root, "data", "processed")
-    os.makedirs(out_dir, exist_ok=True)
-    out_path = os.path.join(out_dir, output_excel_name)
+    # Build the workbook next to out_path and only swap it in once every
+    # document succeeded: on an exception xlsxwriter still closes (writes)
+    # the file, which would replace the last good output with a partial one
+    tmp_path = f"{out_path}.tmp"
+
+    try:
+        with contextlib.ExitStack() as stack:
+            doc_map = stack.enter_context(_doc_map(max_workers, per_worker_rps))
+            results = doc_map(process_one, doc_ids)
+
+            # constant_memory flushes each row to disk as soon as the next one
+            # starts, so memory stays flat however many documents there are
+            workbook = stack.enter_context(
+                xlsxwriter.Workbook(tmp_path, {"constant_memory": True})
+            )
+
+            # Two sheets: one for rows, one for page metadata (super useful for QA)
+            ws_rows = workbook.add_worksheet("rows")
+            ws_meta = workbook.add_worksheet("page_metadata")
+            ws_rows.write_row(0, 0, ROW_COLUMNS)
+            ws_meta.write_row(0, 0, META_COLUMNS)
+            next_row, next_meta = 1, 1
+
+            # executor.map preserves input order, so output stays sorted by doc_id
+            for doc_id, (doc_meta, doc_rows) in zip(doc_ids, results):
+                # LedgerRow dicts are only materialised here, just before writing
+                next_row = _write_records(ws_rows, next_row, doc_rows.to_rows(), ROW_COLUMNS)
+                next_meta = _write_records(ws_meta, next_meta, doc_meta, META_COLUMNS)
+
+                print(f"Finished {doc_id}: pages={len(doc_meta)}, rows={len(doc_rows)}")
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
 
-    # Two sheets: one for rows, one for page metadata (super useful for QA)
-    with pd.ExcelWriter(out_path, engine="openpyxl") as writer:
-        df_rows.to_excel(writer, sheet_name="rows", index=False)
-        df_meta.to_excel(writer, sheet_name="page_metadata", index=False)
+    os.replace(tmp_path, out_path)
 
     return out_path
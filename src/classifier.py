@@ -1,19 +1,31 @@
 # src/classifier.py
 
+import functools
 import os
-import json
 
 from typing import Any
 
-from openai import OpenAI  # make sure 'openai' is installed
+import orjson
+
 from .schema import PageMetadata, PageType  # type: ignore[import]
-from .utils import load_env  # type: ignore[import]
+from ._llm_cache import cached_chat_json, llm_cache_path  # type: ignore[import]
+from .utils import fill_prompt_template  # type: ignore[import]
+
+
+CLASSIFIER_SYSTEM_PROMPT = (
+    "You are a precise assistant that classifies historical ledger pages "
+    "and must respond with STRICT JSON only."
+)
 
 
+@functools.lru_cache(maxsize=1)
 def load_classifier_prompt_template() -> str:
     """
     Load the classifier prompt template from prompts/classifier_prompt.txt.
     Assumes this file is located in the 'prompts' directory at the project root.
+
+    The file is read once per process; call
+    load_classifier_prompt_template.cache_clear() after editing it.
     """
     # Find project root as the parent directory of this file's directory
     current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -34,11 +46,13 @@ def build_classifier_prompt(doc_id: str, page_id: int, page_text: str) -> str:
     """
     template = load_classifier_prompt_template()
 
-    prompt = (
-        template
-        .replace("{{DOC_ID}}", str(doc_id))
-        .replace("{{PAGE_ID}}", str(page_id))
-        .replace("{{PAGE_TEXT}}", page_text)
+    prompt = fill_prompt_template(
+        template,
+        {
+            "DOC_ID": str(doc_id),
+            "PAGE_ID": str(page_id),
+            "PAGE_TEXT": page_text,
+        },
     )
 
     return prompt
@@ -54,45 +68,49 @@ def classify_page_with_llm(
 
     Steps:
     - Build the classifier prompt.
-    - Call the OpenAI Chat Completions API in JSON mode.
+    - Call the OpenAI Chat Completions API in JSON mode, unless the same
+      prompt was already answered (cached under data/interim/{doc_id}/classify/).
     - Parse the JSON into a PageMetadata object.
     """
 
-    # Ensure environment variables (including OPENAI_API_KEY) are loaded
-    load_env()
-
-    client = OpenAI()
-
     prompt = build_classifier_prompt(
         doc_id=doc_id,
         page_id=page_id,
         page_text=page_text,
     )
 
-    response = client.chat.completions.create(
+    cache_path = llm_cache_path(
+        doc_id=doc_id,
+        page_id=page_id,
+        stage="classify",
         model=model,
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "You are a precise assistant that classifies historical ledger pages "
-                    "and must respond with STRICT JSON only."
-                ),
-            },
-            {
-                "role": "user",
-                "content": prompt,
-            },
-        ],
-        response_format={"type": "json_object"},
-        temperature=0,
+        system_prompt=CLASSIFIER_SYSTEM_PROMPT,
+        prompt=prompt,
     )
+    content = cached_chat_json(
+        prompt=prompt,
+        model=model,
+        cache_path=cache_path,
+        system_prompt=CLASSIFIER_SYSTEM_PROMPT,
+        stage="classify",
+    )
+
+    data = orjson.loads(content)
 
-    content = response.choices[0].message.content
-    if content is None:
-        raise RuntimeError("LLM returned empty content for page classification.")
+    return parse_classifier_response(data, doc_id=doc_id, page_id=page_id)
 
-    data = json.loads(content)
+
+def parse_classifier_response(
+    data: Any,
+    doc_id: str,
+    page_id: int,
+) -> PageMetadata:
+    """
+    Validate a decoded classifier JSON object and turn it into PageMetadata,
+    falling back to doc_id / page_id and "Unknown" where fields are missing.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Classifier response is not a JSON object.")
 
     # Basic validation / defaults
     page_type_raw = data.get("page_type", "Unknown")
@@ -0,0 +1,145 @@
+# src/combined.py
+
+import functools
+import os
+from typing import List, Tuple
+
+import orjson
+
+from .schema import LedgerRow, PageMetadata, PageRowsBatch  # type: ignore[import]
+from .classifier import parse_classifier_response  # type: ignore[import]
+from .extractor import parse_extraction_response  # type: ignore[import]
+from ._llm_cache import cached_chat_json, llm_cache_path  # type: ignore[import]
+from .utils import fill_prompt_template  # type: ignore[import]
+
+
+COMBINED_SYSTEM_PROMPT = (
+    "You are a precise assistant that classifies historical ledger pages, "
+    "extracts their structured ledger entries, and must respond with STRICT "
+    "JSON only."
+)
+
+
+@functools.lru_cache(maxsize=1)
+def load_combined_prompt_template() -> str:
+    """
+    Load the combined classify + extract prompt template from
+    prompts/combined_prompt.txt.
+    Assumes this file is located in the 'prompts' directory at the project root.
+    """
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.abspath(os.path.join(current_dir, ".."))
+
+    prompt_path = os.path.join(project_root, "prompts", "combined_prompt.txt")
+
+    with open(prompt_path, "r", encoding="utf-8") as f:
+        template = f.read()
+
+    return template
+
+
+def build_combined_prompt(doc_id: str, page_id: int, page_text: str) -> str:
+    """
+    Fill the combined prompt template with the given doc_id, page_id, and page_text.
+    Returns the final prompt string to be sent to the LLM.
+    """
+    template = load_combined_prompt_template()
+
+    prompt = fill_prompt_template(
+        template,
+        {
+            "DOC_ID": str(doc_id),
+            "PAGE_ID": str(page_id),
+            "PAGE_TEXT": page_text,
+        },
+    )
+
+    return prompt
+
+
+def parse_combined_response(
+    data: object,
+    doc_id: str,
+    page_id: int,
+) -> Tuple[PageMetadata, PageRowsBatch]:
+    """
+    Split a decoded {"meta": {...}, "rows": [...]} response and validate
+    each half with the classifier / extractor parsers.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("meta"), dict):
+        raise ValueError("Combined response has no 'meta' object.")
+    if not isinstance(data.get("rows"), list):
+        raise ValueError("Combined response has no 'rows' list.")
+
+    page_meta = parse_classifier_response(
+        data["meta"],
+        doc_id=doc_id,
+        page_id=page_id,
+    )
+    rows = parse_extraction_response(data, page_meta=page_meta)
+
+    return page_meta, rows
+
+
+def process_page_with_llm_batch(
+    doc_id: str,
+    page_id: int,
+    page_text: str,
+    model: str = "gpt-4o-mini",
+) -> Tuple[PageMetadata, PageRowsBatch]:
+    """
+    Classify a page and extract its rows with ONE LLM call, returning the
+    rows as a PageRowsBatch.
+
+    Half the round-trips of classify_page_with_llm() + extract_page_with_llm(),
+    and the shared instructions are only sent once. Responses are cached
+    under data/interim/{doc_id}/combined/.
+
+    Raises on API or parse errors; pipeline.process_single_page_batch()
+    then falls back to the two-call path.
+    """
+
+    prompt = build_combined_prompt(
+        doc_id=doc_id,
+        page_id=page_id,
+        page_text=page_text,
+    )
+
+    cache_path = llm_cache_path(
+        doc_id=doc_id,
+        page_id=page_id,
+        stage="combined",
+        model=model,
+        system_prompt=COMBINED_SYSTEM_PROMPT,
+        prompt=prompt,
+    )
+    content = cached_chat_json(
+        prompt=prompt,
+        model=model,
+        cache_path=cache_path,
+        system_prompt=COMBINED_SYSTEM_PROMPT,
+        stage="combined",
+    )
+
+    data = orjson.loads(content)
+
+    return parse_combined_response(data, doc_id=doc_id, page_id=page_id)
+
+
+def process_page_with_llm(
+    doc_id: str,
+    page_id: int,
+    page_text: str,
+    model: str = "gpt-4o-mini",
+) -> Tuple[PageMetadata, List[LedgerRow]]:
+    """
+    Classify a page and extract its rows with ONE LLM call
+    (see process_page_with_llm_batch).
+    """
+    page_meta, rows = process_page_with_llm_batch(
+        doc_id=doc_id,
+        page_id=page_id,
+        page_text=page_text,
+        model=model,
+    )
+    return page_meta, rows.to_rows()
@@ -1,22 +1,39 @@
+import functools
 import os
-import json
-from typing import List
+from typing import Any, List
+
+import orjson
+
+from .schema import (
+    MODEL_CONF_FIELDS,
+    NUMERIC_FIELDS,
+    LedgerRow,
+    PageMetadata,
+    PageRowsBatch,
+    amount_to_float,
+    conf_to_float,
+)  # type: ignore[import]
+from .scorer import score_batch  # type: ignore[import]
+from ._llm_cache import cached_chat_json, llm_cache_path  # type: ignore[import]
+from .utils import fill_prompt_template  # type: ignore[import]
 
-from openai import OpenAI  # <-- requires the openai package we installed
 
-from .schema import PageMetadata, LedgerRow  # type: ignore[import]
-from .scorer import (
-    compute_rule_based_confidence,
-    compute_row_confidence,
-)  # type: ignore[import]
-from .utils import load_env  # type: ignore[import]
+EXTRACTION_SYSTEM_PROMPT = (
+    "You are a precise assistant that extracts structured ledger entries "
+    "and must respond with STRICT JSON only."
+)
 
+_TRANSACTION_TYPES = frozenset(("Debit", "Credit", "Unknown"))
 
 
+@functools.lru_cache(maxsize=1)
 def load_extraction_prompt_template() -> str:
     """
     Load the extraction prompt template from prompts/extraction_prompt.txt.
     Assumes this file is located in the 'prompts' directory at the project root.
+
+    The file is read once per process; call
+    load_extraction_prompt_template.cache_clear() after editing it.
     """
     current_dir = os.path.dirname(os.path.abspath(__file__))
     project_root = os.path.abspath(os.path.join(current_dir, ".."))
@@ -39,131 +56,147 @@ def build_extraction_prompt(
     """
     template = load_extraction_prompt_template()
 
-    prompt = (
-        template
-        .replace("{{DOC_ID}}", str(page_meta["doc_id"]))
-        .replace("{{PAGE_ID}}", str(page_meta["page_id"]))
-        .replace("{{PAGE_TYPE}}", page_meta["page_type"])
-        .replace(
-            "{{FINANCIAL_STRUCTURE_OVERVIEW}}",
-            page_meta["financial_structure_overview"],
-        )
-        .replace("{{PAGE_TEXT}}", page_text)
+    prompt = fill_prompt_template(
+        template,
+        {
+            "DOC_ID": str(page_meta["doc_id"]),
+            "PAGE_ID": str(page_meta["page_id"]),
+            "PAGE_TYPE": page_meta["page_type"],
+            "FINANCIAL_STRUCTURE_OVERVIEW": page_meta["financial_structure_overview"],
+            "PAGE_TEXT": page_text,
+        },
     )
 
     return prompt
 
-def extract_page_with_llm(
+def extract_page_with_llm_batch(
     page_meta: PageMetadata,
     page_text: str,
     model: str = "gpt-4o-mini",
-) -> List[LedgerRow]:
-    """
-    LLM-backed extraction of ledger rows from a single page.
+) -> PageRowsBatch:
     """
+    LLM-backed extraction of ledger rows from a single page, as a
+    PageRowsBatch.
 
-    # Load environment and API key
-    load_env()
-    client = OpenAI()
+    Responses are cached under data/interim/{doc_id}/extract/, keyed by a
+    hash of the model and the filled prompt, so re-runs on unchanged pages
+    do not call the API again.
+    """
 
     prompt = build_extraction_prompt(
         page_meta=page_meta,
         page_text=page_text,
     )
 
-    response = client.chat.completions.create(
+    cache_path = llm_cache_path(
+        doc_id=page_meta["doc_id"],
+        page_id=page_meta["page_id"],
+        stage="extract",
         model=model,
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "You are a precise assistant that extracts structured ledger entries "
-                    "and must respond with STRICT JSON only."
-                ),
-            },
-            {
-                "role": "user",
-                "content": prompt,
-            },
-        ],
-        response_format={"type": "json_object"},
-        temperature=0,
+        system_prompt=EXTRACTION_SYSTEM_PROMPT,
+        prompt=prompt,
+    )
+    content = cached_chat_json(
+        prompt=prompt,
+        model=model,
+        cache_path=cache_path,
+        system_prompt=EXTRACTION_SYSTEM_PROMPT,
+        stage="extract",
     )
 
-    content = response.choices[0].message.content
-    if content is None:
-        raise RuntimeError("LLM returned empty content for extraction.")
+    data = orjson.loads(content)
 
-    data = json.loads(content)
+    return parse_extraction_response(data, page_meta=page_meta)
 
-    rows_data = data.get("rows", [])
-    parsed_rows: List[LedgerRow] = []
 
-    for i, r in enumerate(rows_data):
+def extract_page_with_llm(
+    page_meta: PageMetadata,
+    page_text: str,
+    model: str = "gpt-4o-mini",
+) -> List[LedgerRow]:
+    """
+    LLM-backed extraction of ledger rows from a single page
+    (see extract_page_with_llm_batch).
+    """
+    rows = extract_page_with_llm_batch(
+        page_meta=page_meta,
+        page_text=page_text,
+        model=model,
+    )
+    return rows.to_rows()
 
-        doc_id = str(r.get("doc_id", page_meta["doc_id"]))
-        page_id = int(r.get("page_id", page_meta["page_id"]))
-        row_id = int(r.get("row_id", i))
-
-        description = str(r.get("description", "") or "")
-        tx_raw = r.get("transaction_type", "Unknown")
-        tx_type = tx_raw if tx_raw in ("Debit", "Credit", "Unknown") else "Unknown"
-
-        pounds = r.get("pounds")
-        shillings = r.get("shillings")
-        pence = r.get("pence")
-        pence_fraction = r.get("pence_fraction")
-
-        # Model confidences
-        mc_desc = float(r.get("model_conf_description", 0.0))
-        mc_tx = float(r.get("model_conf_transaction_type", 0.0))
-        mc_pounds = float(r.get("model_conf_pounds", 0.0))
-        mc_shillings = float(r.get("model_conf_shillings", 0.0))
-        mc_pence = float(r.get("model_conf_pence", 0.0))
-        mc_pf = float(r.get("model_conf_pence_fraction", 0.0))
-
-        row: LedgerRow = {
-            "doc_id": doc_id,
-            "page_id": page_id,
-            "row_id": row_id,
-            "description": description,
-            "transaction_type": tx_type,
-            "pounds": pounds,
-            "shillings": shillings,
-            "pence": pence,
-            "pence_fraction": pence_fraction,
-            "model_conf_description": mc_desc,
-            "model_conf_transaction_type": mc_tx,
-            "model_conf_pounds": mc_pounds,
-            "model_conf_shillings": mc_shillings,
-            "model_conf_pence": mc_pence,
-            "model_conf_pence_fraction": mc_pf,
-            "rule_based_confidence": 0.0,
-            "row_confidence": 0.0,
-        }
 
-        parsed_rows.append(row)
+def _build_row(
+    batch: PageRowsBatch,
+    i: int,
+    r: dict,
+    default_doc_id: str,
+    default_page_id: int,
+) -> None:
+    """
+    Fill row i of batch from one raw row object from the LLM.
 
-    return parsed_rows
+    Runs once per extracted row, so r.get is bound to a local.
+    """
+    g = r.get
 
+    tx_raw = g("transaction_type", "Unknown")
 
-def extract_page(
+    batch.doc_ids[i] = str(g("doc_id", default_doc_id))
+    batch.page_ids[i] = int(g("page_id", default_page_id))
+    batch.row_ids[i] = int(g("row_id", i))
+    batch.descriptions[i] = str(g("description", "") or "")
+    batch.tx_types[i] = tx_raw if tx_raw in _TRANSACTION_TYPES else "Unknown"
+    batch.numeric[i] = [amount_to_float(g(k)) for k in NUMERIC_FIELDS]
+    batch.pence_fractions[i] = g("pence_fraction")
+    # Model confidences
+    batch.confs[i] = [conf_to_float(g(k, 0.0)) for k in MODEL_CONF_FIELDS]
+
+
+def parse_extraction_response(
+    data: Any,
+    page_meta: PageMetadata,
+) -> PageRowsBatch:
+    """
+    Validate a decoded extraction JSON object ({"rows": [...]}) and collect
+    the rows column-wise into a PageRowsBatch. Confidence scores are left
+    at 0.0 for the scorer.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Extraction response is not a JSON object.")
+
+    rows_data = data.get("rows", [])
+    if not isinstance(rows_data, list):
+        raise ValueError("Extraction response 'rows' is not a list.")
+
+    default_doc_id = page_meta["doc_id"]
+    default_page_id = page_meta["page_id"]
+
+    batch = PageRowsBatch.empty(len(rows_data))
+    for i, r in enumerate(rows_data):
+        _build_row(batch, i, r, default_doc_id, default_page_id)
+
+    return batch
+
+
+def extract_page_batch(
     page_meta: PageMetadata,
     page_text: str,
-) -> List[LedgerRow]:
+) -> PageRowsBatch:
     """
-    Public entry point for row extraction.
+    Row extraction without scoring.
 
     Tries:
     1) LLM extraction
     2) Falls back to dummy extraction
-    3) Applies rule-based + combined confidence to all rows
-    """
 
-    rows: List[LedgerRow] = []
+    rule_based_confidence / row_confidence are left at 0.0, so that
+    pipeline.process_document() can score a whole document's rows in one
+    scorer.score_batch() pass.
+    """
 
     try:
-        rows = extract_page_with_llm(
+        rows = extract_page_with_llm_batch(
             page_meta=page_meta,
             page_text=page_text,
         )
@@ -197,13 +230,21 @@ def extract_page(
             "row_confidence": 0.0,
         }
 
-        rows = [dummy_row]
-
-    # Apply rule-based & combined confidences
-    for row in rows:
-        rb = compute_rule_based_confidence(row=row)
-        combined = compute_row_confidence(row=row, rule_weight=0.4)
-        row["rule_based_confidence"] = rb
-        row["row_confidence"] = combined
+        rows = PageRowsBatch.from_rows([dummy_row])
 
     return rows
+
+
+def extract_page(
+    page_meta: PageMetadata,
+    page_text: str,
+) -> List[LedgerRow]:
+    """
+    Public entry point for row extraction.
+
+    Same as extract_page_batch(), with rule_based_confidence and
+    row_confidence filled in by scorer.score_batch(), returned as
+    LedgerRow dicts.
+    """
+    rows = extract_page_batch(page_meta=page_meta, page_text=page_text)
+    return score_batch(rows).to_rows()
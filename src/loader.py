@@ -1,9 +1,29 @@
 # src/loader.py
 
+import collections
+import json
 import os
-from typing import Dict
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, Dict, Optional, Tuple
 
 import pdfplumber
+from PIL import Image
+
+
+# Vision models downsample page images internally; beyond ~200 DPI the
+# extra pixels only cost upload bytes and image tokens.
+DEFAULT_RESOLUTION = 200
+
+# Scanned ledger pages are photographic greyscale; JPEG is ~10x smaller
+# than lossless PNG with no visible loss for OCR.
+PAGE_IMAGE_EXT = "jpg"
+JPEG_QUALITY = 85
+
+# pdfplumber rasterises through pypdfium2, and PDFium is not thread-safe
+# even across separate document handles: every to_image() call in this
+# process goes through this lock.
+_PDFIUM_LOCK = threading.Lock()
 
 
 def get_pdf_path(doc_id: str) -> str:
@@ -90,12 +110,95 @@ def load_pdf_as_pages(doc_id: str) -> Dict[int, str]:
     return pages
 
 
-def export_pdf_pages_as_images(doc_id: str, resolution: int = 300) -> Dict[int, str]:
+def get_interim_dir(doc_id: str) -> str:
+    """
+    Per-document working directory for page images and caches:
+        data/interim/{doc_id}/
+    """
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.abspath(os.path.join(current_dir, ".."))
+    return os.path.join(project_root, "data", "interim", doc_id)
+
+
+def _render_signature(pdf_path: str, resolution: int) -> dict:
+    """
+    What the exported images depend on: the PDF file itself (size + mtime)
+    and the render settings. If any of these change, images are re-rendered.
+    """
+    st = os.stat(pdf_path)
+    return {
+        "pdf_size": st.st_size,
+        "pdf_mtime_ns": st.st_mtime_ns,
+        "resolution": resolution,
+        "format": PAGE_IMAGE_EXT,
+        "quality": JPEG_QUALITY,
+    }
+
+
+def _page_count_path(doc_id: str) -> str:
+    return os.path.join(get_interim_dir(doc_id), ".pagecount")
+
+
+def cached_page_count(
+    doc_id: str,
+    resolution: int = DEFAULT_RESOLUTION,
+) -> Optional[int]:
+    """
+    Page count recorded by the last full export_pdf_pages_as_images() run,
+    or None if there was none or the PDF / resolution changed since.
+
+    Read from the sidecar file data/interim/{doc_id}/.pagecount, so it does
+    not need to open the PDF.
+    """
+    sidecar = _page_count_path(doc_id)
+    if not os.path.exists(sidecar):
+        return None
+
+    try:
+        with open(sidecar, "r", encoding="utf-8") as f:
+            recorded = json.load(f)
+        expected = _render_signature(get_pdf_path(doc_id), resolution)
+    except (OSError, ValueError):
+        return None
+
+    if any(recorded.get(k) != v for k, v in expected.items()):
+        return None
+
+    page_count = recorded.get("page_count")
+    return page_count if isinstance(page_count, int) else None
+
+
+def _save_page_jpeg(image: "Image.Image", out_path: str) -> None:
+    """
+    Encode one rendered page as an optimized, progressive JPEG.
+    """
+    image.save(
+        out_path,
+        format="JPEG",
+        quality=JPEG_QUALITY,
+        optimize=True,
+        progressive=True,
+    )
+
+
+def export_pdf_pages_as_images(
+    doc_id: str,
+    resolution: int = DEFAULT_RESOLUTION,
+    max_workers: int = 8,
+) -> Dict[int, str]:
     """
-    Export each page of data/raw/{doc_id}.pdf as a PNG image.
+    Export each page of data/raw/{doc_id}.pdf as an optimized JPEG image.
 
     Images are saved under:
-        data/interim/{doc_id}/page_{page_id}.png
+        data/interim/{doc_id}/page_{page_id}.jpg
+
+    Pages are rasterised one at a time (PDFium is not thread-safe); the JPEG
+    encoding and saving, which releases the GIL, is spread over up to
+    `max_workers` threads (capped at the CPU count and the page count).
+
+    If a previous run already exported every page of the same PDF at the
+    same resolution (see cached_page_count), the existing images are
+    returned without opening the PDF.
 
     Returns:
         A dict mapping page_id (1-based) -> image_path.
@@ -105,18 +208,55 @@ def export_pdf_pages_as_images(doc_id: str, resolution: int = 300) -> Dict[int,
     if not os.path.exists(pdf_path):
         raise FileNotFoundError(f"PDF not found at: {pdf_path}")
 
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.abspath(os.path.join(current_dir, ".."))
-    out_dir = os.path.join(project_root, "data", "interim", doc_id)
+    out_dir = get_interim_dir(doc_id)
     os.makedirs(out_dir, exist_ok=True)
 
+    page_count = cached_page_count(doc_id, resolution=resolution)
+    if page_count is not None:
+        existing = {
+            i: os.path.join(out_dir, f"page_{i}.{PAGE_IMAGE_EXT}")
+            for i in range(1, page_count + 1)
+        }
+        if all(os.path.exists(path) for path in existing.values()):
+            return existing
+
+    signature = _render_signature(pdf_path, resolution)
+
     page_images: Dict[int, str] = {}
 
     with pdfplumber.open(pdf_path) as pdf:
-        for i, page in enumerate(pdf.pages, start=1):
-            page_image = page.to_image(resolution=resolution)
-            out_path = os.path.join(out_dir, f"page_{i}.png")
-            page_image.save(out_path, format="PNG")
-            page_images[i] = out_path
-
-    return page_images
\ No newline at end of file
+        page_count = len(pdf.pages)
+        if page_count == 0:
+            return page_images
+
+        n_workers = max(1, min(max_workers, os.cpu_count() or 1, page_count))
+        pending: Deque[Tuple[int, str, Future]] = collections.deque()
+
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            for i in range(1, page_count + 1):
+                # Rasterise serially: PDFium is not thread-safe
+                with _PDFIUM_LOCK:
+                    image = pdf.pages[i - 1].to_image(resolution=resolution).original
+                out_path = os.path.join(out_dir, f"page_{i}.{PAGE_IMAGE_EXT}")
+                # Save the PIL image directly: PageImage.save() palette-quantizes,
+                # which JPEG cannot store
+                future = executor.submit(_save_page_jpeg, image, out_path)
+                pending.append((i, out_path, future))
+                del image
+
+                # Bound the number of rendered pages held in memory
+                # while they wait for an encoder thread
+                while len(pending) > 2 * n_workers:
+                    page_id, path, future = pending.popleft()
+                    future.result()
+                    page_images[page_id] = path
+
+            for page_id, path, future in pending:
+                future.result()
+                page_images[page_id] = path
+
+    # Only record the page count once every page has been written
+    with open(_page_count_path(doc_id), "w", encoding="utf-8") as f:
+        json.dump({"page_count": page_count, **signature}, f)
+
+    return dict(sorted(page_images.items()))
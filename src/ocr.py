@@ -1,54 +1,84 @@
 # src/ocr.py
 
+import asyncio
 import base64
+import io
 import os
+from typing import Any, List, Optional, Tuple
 
-from openai import OpenAI  # requires 'openai' package installed
-from .utils import load_env  # type: ignore[import]
+from openai import AsyncOpenAI
+from PIL import Image
 
+from ._openai_client import get_client, new_async_client  # type: ignore[import]
+from ._retry import (
+    create_chat_completion,
+    create_chat_completion_async,
+)  # type: ignore[import]
 
-def ocr_page_with_gpt(
+
+# Longest image side sent to the OCR model; larger pages are downscaled first
+MAX_UPLOAD_SIDE = 2048
+
+OCR_SYSTEM_PROMPT = (
+    "You are a careful OCR assistant. You read historical ledger pages "
+    "and transcribe the text faithfully, line by line, without adding "
+    "extra interpretation."
+)
+
+OCR_USER_INSTRUCTIONS = (
+    "Please transcribe all visible text from this ledger page.\n"
+    "- Preserve the line order from top to bottom.\n"
+    "- Separate lines with newline characters.\n"
+    "- Include column headers, names, places, and amounts.\n"
+    "- Do NOT summarise or interpret; just transcribe."
+)
+
+
+def _read_image_for_upload(
     image_path: str,
-    model: str = "gpt-4o-mini",
-) -> str:
+    max_side: int = MAX_UPLOAD_SIDE,
+) -> Tuple[bytes, str]:
     """
-    Use an OpenAI vision-capable model to perform OCR on a single ledger page image.
+    Return (image bytes, MIME type) to upload for a page image.
 
-    Parameters
-    ----------
-    image_path : str
-        Path to a PNG image of a single page (e.g. data/interim/1704/page_1.png).
-    model : str
-        A vision-capable chat model, e.g. "gpt-4o-mini".
-
-    Returns
-    -------
-    page_text : str
-        A plain-text transcription of the ledger page, line by line.
+    Images whose longest side exceeds max_side are downscaled (keeping the
+    aspect ratio) and re-encoded as an optimized JPEG in memory; the file on
+    disk is left unchanged. Smaller images are sent as they are (JPEG pages
+    from export_pdf_pages_as_images, or older PNG exports).
     """
+    with Image.open(image_path) as img:
+        if max(img.size) <= max_side:
+            mime = Image.MIME.get(img.format or "", "image/jpeg")
+            with open(image_path, "rb") as f:
+                return f.read(), mime
 
-    if not os.path.exists(image_path):
-        raise FileNotFoundError(f"Image not found at: {image_path}")
+        img.thumbnail((max_side, max_side), Image.LANCZOS)
+        if img.mode not in ("L", "RGB"):
+            img = img.convert("RGB")
+        buf = io.BytesIO()
+        img.save(buf, format="JPEG", quality=85, optimize=True)
+        return buf.getvalue(), "image/jpeg"
 
-    # Ensure environment variables (OPENAI_API_KEY) are loaded
-    load_env()
 
-    client = OpenAI()
+def _build_ocr_messages(image_path: str) -> List[dict]:
+    """
+    Build the multimodal chat messages (image + instructions) for one page.
+    Shared by the sync and async OCR entry points.
+    """
+    if not os.path.exists(image_path):
+        raise FileNotFoundError(f"Image not found at: {image_path}")
 
-    # Read image as base64
-    with open(image_path, "rb") as f:
-        image_bytes = f.read()
-    b64_image = base64.b64encode(image_bytes).decode("utf-8")
+    # Drop the raw bytes as soon as they are encoded
+    # (base64 output is pure ASCII, the cheapest decode)
+    image_bytes, mime = _read_image_for_upload(image_path)
+    b64_image = base64.b64encode(image_bytes).decode("ascii")
+    del image_bytes
 
     # Build the multimodal message: image + instructions
     messages = [
         {
             "role": "system",
-            "content": (
-                "You are a careful OCR assistant. You read historical ledger pages "
-                "and transcribe the text faithfully, line by line, without adding "
-                "extra interpretation."
-            ),
+            "content": OCR_SYSTEM_PROMPT,
         },
         {
             "role": "user",
@@ -56,29 +86,20 @@ def ocr_page_with_gpt(
                 {
                     "type": "image_url",
                     "image_url": {
-                        "url": f"data:image/png;base64,{b64_image}"
+                        "url": f"data:{mime};base64,{b64_image}"
                     },
                 },
                 {
                     "type": "text",
-                    "text": (
-                        "Please transcribe all visible text from this ledger page.\n"
-                        "- Preserve the line order from top to bottom.\n"
-                        "- Separate lines with newline characters.\n"
-                        "- Include column headers, names, places, and amounts.\n"
-                        "- Do NOT summarise or interpret; just transcribe."
-                    ),
+                    "text": OCR_USER_INSTRUCTIONS,
                 },
             ],
         },
     ]
+    return messages
 
-    response = client.chat.completions.create(
-        model=model,
-        messages=messages,
-        temperature=0,
-    )
 
+def _parse_ocr_response(response: Any) -> str:
     content = response.choices[0].message.content
     if content is None:
         raise RuntimeError("OCR model returned empty content.")
@@ -87,6 +108,76 @@ def ocr_page_with_gpt(
     page_text: str = content.strip()
     return page_text
 
+
+def ocr_page_with_gpt(
+    image_path: str,
+    model: str = "gpt-4o-mini",
+) -> str:
+    """
+    Use an OpenAI vision-capable model to perform OCR on a single ledger page image.
+
+    Parameters
+    ----------
+    image_path : str
+        Path to an image of a single page (e.g. data/interim/1704/page_1.jpg).
+    model : str
+        A vision-capable chat model, e.g. "gpt-4o-mini".
+
+    Returns
+    -------
+    page_text : str
+        A plain-text transcription of the ledger page, line by line.
+    """
+
+    messages = _build_ocr_messages(image_path)
+
+    client = get_client()
+
+    response = create_chat_completion(
+        client,
+        stage="ocr",
+        model=model,
+        messages=messages,
+        temperature=0,
+    )
+
+    return _parse_ocr_response(response)
+
+
+async def ocr_page_with_gpt_async(
+    image_path: str,
+    model: str = "gpt-4o-mini",
+    client: Optional[AsyncOpenAI] = None,
+) -> str:
+    """
+    Async variant of ocr_page_with_gpt() using AsyncOpenAI, so many pages
+    can be in flight at once (see batch.ocr_pdf_to_pages_cached).
+
+    Pass the caller's `client` (see _openai_client.new_async_client) to
+    share its connections across pages; without one, a client is opened
+    and closed for this page alone.
+
+    Reading, downscaling and base64-encoding the image is CPU work, so it
+    runs in a worker thread instead of blocking the event loop; the other
+    in-flight pages keep being prepared and sent meanwhile.
+    """
+
+    if client is None:
+        async with new_async_client() as own_client:
+            return await ocr_page_with_gpt_async(image_path, model=model, client=own_client)
+
+    messages = await asyncio.to_thread(_build_ocr_messages, image_path)
+
+    response = await create_chat_completion_async(
+        client,
+        stage="ocr",
+        model=model,
+        messages=messages,
+        temperature=0,
+    )
+
+    return _parse_ocr_response(response)
+
 from typing import Dict
 from .loader import export_pdf_pages_as_images  # type: ignore[import]
 
@@ -99,7 +190,7 @@ def ocr_pdf_to_pages(
     Run OCR with GPT on all pages of data/raw/{doc_id}.pdf.
 
     Steps:
-    - Export each page as PNG: data/interim/{doc_id}/page_{i}.png
+    - Export each page as JPEG: data/interim/{doc_id}/page_{i}.jpg
     - Run ocr_page_with_gpt on each image
     - Return a dict mapping page_id -> transcribed text
 
@@ -0,0 +1,209 @@
+# src/openai_batch.py
+
+import os
+import time
+from typing import Any, Dict, Iterator, List, Tuple
+
+import orjson
+
+from .combined import COMBINED_SYSTEM_PROMPT, build_combined_prompt  # type: ignore[import]
+from ._llm_cache import (
+    json_chat_request,
+    llm_cache_path,
+    store_cached_json,
+)  # type: ignore[import]
+from ._openai_client import get_client  # type: ignore[import]
+from ._retry import retry_llm  # type: ignore[import]
+
+# Batch API limits per input file (bytes kept a little under the 200 MB cap)
+MAX_REQUESTS_PER_BATCH = 50_000
+MAX_BATCH_FILE_BYTES = 190 * 1024 * 1024
+
+_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+@retry_llm()
+def _upload_batch_file(client: Any, jsonl: bytes) -> Any:
+    return client.files.create(file=("requests.jsonl", jsonl), purpose="batch")
+
+
+@retry_llm()
+def _create_batch(client: Any, input_file_id: str, completion_window: str) -> Any:
+    return client.batches.create(
+        input_file_id=input_file_id,
+        endpoint="/v1/chat/completions",
+        completion_window=completion_window,
+    )
+
+
+@retry_llm()
+def _retrieve_batch(client: Any, batch_id: str) -> Any:
+    return client.batches.retrieve(batch_id)
+
+
+@retry_llm()
+def _download_file_text(client: Any, file_id: str) -> str:
+    return client.files.content(file_id).text
+
+
+def _combined_requests(
+    pages_by_doc: Dict[str, Dict[int, str]],
+    model: str,
+) -> List[Tuple[str, str, dict]]:
+    """
+    (custom_id, cache_path, request_line) for every page whose combined
+    classify + extract response is not cached yet.
+    """
+    requests: List[Tuple[str, str, dict]] = []
+
+    for doc_id, pages in pages_by_doc.items():
+        for page_id in sorted(pages):
+            prompt = build_combined_prompt(
+                doc_id=doc_id,
+                page_id=page_id,
+                page_text=pages[page_id],
+            )
+            cache_path = llm_cache_path(
+                doc_id=doc_id,
+                page_id=page_id,
+                stage="combined",
+                model=model,
+                system_prompt=COMBINED_SYSTEM_PROMPT,
+                prompt=prompt,
+            )
+            if os.path.exists(cache_path):
+                continue
+
+            custom_id = f"{doc_id}:{page_id}:combined"
+            line = {
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": json_chat_request(prompt, model, COMBINED_SYSTEM_PROMPT),
+            }
+            requests.append((custom_id, cache_path, line))
+
+    return requests
+
+
+def _jsonl_chunks(lines: List[dict]) -> Iterator[Tuple[bytes, int]]:
+    """
+    Serialise request lines into JSONL files that respect the Batch API
+    limits. Yields (file bytes, number of requests).
+    """
+    chunk: List[bytes] = []
+    size = 0
+
+    for line in lines:
+        encoded = orjson.dumps(line) + b"\n"
+        if chunk and (
+            len(chunk) >= MAX_REQUESTS_PER_BATCH
+            or size + len(encoded) > MAX_BATCH_FILE_BYTES
+        ):
+            yield b"".join(chunk), len(chunk)
+            chunk, size = [], 0
+        chunk.append(encoded)
+        size += len(encoded)
+
+    if chunk:
+        yield b"".join(chunk), len(chunk)
+
+
+def _wait_for_batch(client: Any, batch_id: str, poll_interval: float) -> Any:
+    while True:
+        batch = _retrieve_batch(client, batch_id)
+        progress = ""
+        if batch.request_counts is not None:
+            c = batch.request_counts
+            progress = f" ({c.completed}/{c.total} done, {c.failed} failed)"
+        print(f"[batch] {batch_id}: {batch.status}{progress}")
+
+        if batch.status in _TERMINAL_STATUSES:
+            return batch
+        time.sleep(poll_interval)
+
+
+def _store_batch_output(text: str, cache_paths: Dict[str, str]) -> int:
+    """
+    Write each successful response in a batch output file to its page's
+    combined cache. Returns the number of pages stored.
+    """
+    stored = 0
+
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        result = orjson.loads(line)
+        cache_path = cache_paths.get(result.get("custom_id", ""))
+        response = result.get("response") or {}
+        if cache_path is None or response.get("status_code") != 200:
+            continue
+
+        try:
+            content = response["body"]["choices"][0]["message"]["content"]
+            store_cached_json(cache_path, content)
+        except Exception as e:
+            print(f"[batch] unusable response for {result['custom_id']}:", repr(e))
+            continue
+        stored += 1
+
+    return stored
+
+
+def prefill_combined_cache_with_batch_api(
+    pages_by_doc: Dict[str, Dict[int, str]],
+    model: str = "gpt-4o-mini",
+    poll_interval: float = 30.0,
+    completion_window: str = "24h",
+) -> int:
+    """
+    Run the combined classify + extract call for every uncached page through
+    the OpenAI Batch API (about half the price of synchronous calls, results
+    within `completion_window`).
+
+    Each page is sent as one JSONL line with custom_id
+    "{doc_id}:{page_id}:combined". Successful responses are written to the
+    same on-disk cache that combined.process_page_with_llm() reads, so the
+    normal pipeline then finds them without calling the API. Pages whose
+    batch request failed are simply left uncached and go through the
+    synchronous path as before; so are whole batches that cannot be
+    submitted, polled or downloaded (errors are logged, not raised).
+
+    Blocks until all batches finish. Returns the number of pages cached.
+    """
+    requests = _combined_requests(pages_by_doc, model=model)
+    if not requests:
+        return 0
+
+    client = get_client()
+    cache_paths = {custom_id: cache_path for custom_id, cache_path, _ in requests}
+
+    batch_ids: List[str] = []
+    for jsonl, n_requests in _jsonl_chunks([line for _, _, line in requests]):
+        # e.g. Batch API not enabled, enqueued-token limit reached: these
+        # pages just stay uncached and go through the synchronous path
+        try:
+            input_file = _upload_batch_file(client, jsonl)
+            batch = _create_batch(client, input_file.id, completion_window)
+        except Exception as e:
+            print(f"[batch] could not submit {n_requests} pages, leaving them to synchronous calls:", repr(e))
+            continue
+        print(f"[batch] submitted {batch.id} with {n_requests} pages")
+        batch_ids.append(batch.id)
+
+    stored = 0
+    for batch_id in batch_ids:
+        try:
+            batch = _wait_for_batch(client, batch_id, poll_interval)
+            if batch.status != "completed":
+                print(f"[batch] {batch_id} ended as {batch.status}")
+
+            # Expired / cancelled batches may still carry partial results
+            if batch.output_file_id:
+                text = _download_file_text(client, batch.output_file_id)
+                stored += _store_batch_output(text, cache_paths)
+        except Exception as e:
+            print(f"[batch] lost results of {batch_id}, leaving them to synchronous calls:", repr(e))
+
+    print(f"[batch] cached {stored}/{len(requests)} pages")
+    return stored
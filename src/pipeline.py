@@ -2,27 +2,38 @@
 
 from typing import List, Tuple
 
-from .schema import PageMetadata, LedgerRow  # type: ignore[import]
+from .schema import LedgerRow, PageMetadata, PageRowsBatch  # type: ignore[import]
 from .classifier import classify_page       # type: ignore[import]
-from .extractor import extract_page         # type: ignore[import]
+from .extractor import extract_page_batch   # type: ignore[import]
+from .combined import process_page_with_llm_batch  # type: ignore[import]
+from .scorer import score_batch              # type: ignore[import]
 
 
-def process_single_page(
+def process_single_page_batch(
     doc_id: str,
     page_id: int,
     page_text: str,
-) -> Tuple[PageMetadata, List[LedgerRow]]:
+) -> Tuple[PageMetadata, PageRowsBatch]:
     """
-    Minimal end-to-end processing for a single page.
+    Classify and extract a single page, without scoring the rows
+    (rule_based_confidence / row_confidence stay 0.0).
 
-    Steps:
+    Tries one combined classify + extract LLM call first
+    (combined.process_page_with_llm_batch). If that fails for any reason:
     1. Classify the page to get PageMetadata (including page_type).
     2. Extract ledger rows from the page using the extraction module.
-
-    For now, both classification and extraction are using heuristic/dummy logic.
-    Later, they will be upgraded to call the LLM API and parse real outputs.
+    Each of those has its own heuristic/dummy fallback.
     """
 
+    try:
+        return process_page_with_llm_batch(
+            doc_id=doc_id,
+            page_id=page_id,
+            page_text=page_text,
+        )
+    except Exception as e:
+        print("[process_single_page] combined LLM call failed, using two-call path:", repr(e))
+
     # Step 1: classify the page
     page_meta = classify_page(
         doc_id=doc_id,
@@ -31,13 +42,65 @@ def process_single_page(
     )
 
     # Step 2: extract rows using the page metadata
-    rows = extract_page(
+    rows = extract_page_batch(
         page_meta=page_meta,
         page_text=page_text,
     )
 
     return page_meta, rows
 
+
+def process_single_page(
+    doc_id: str,
+    page_id: int,
+    page_text: str,
+) -> Tuple[PageMetadata, List[LedgerRow]]:
+    """
+    Minimal end-to-end processing for a single page: classify, extract and
+    score its rows (see process_single_page_batch).
+    """
+
+    page_meta, rows = process_single_page_batch(
+        doc_id=doc_id,
+        page_id=page_id,
+        page_text=page_text,
+    )
+
+    return page_meta, score_batch(rows).to_rows()
+
+def process_document_batch(
+    doc_id: str,
+    pages: dict[int, str],
+) -> Tuple[List[PageMetadata], PageRowsBatch]:
+    """
+    Same as process_document(), but the rows are returned as one scored
+    PageRowsBatch (concatenated column-wise) instead of LedgerRow dicts.
+    Used by batch.process_all_pdfs_to_excel, which only materialises the
+    dicts when writing them out.
+    """
+
+    all_page_meta: List[PageMetadata] = []
+    page_batches: List[PageRowsBatch] = []
+
+    # Sort pages by page_id so processing is deterministic
+    for page_id in sorted(pages.keys()):
+        page_text = pages[page_id]
+
+        page_meta, rows = process_single_page_batch(
+            doc_id=doc_id,
+            page_id=page_id,
+            page_text=page_text,
+        )
+
+        all_page_meta.append(page_meta)
+        page_batches.append(rows)
+
+    # Rule-based + combined confidences, one vectorised pass per document
+    all_rows = score_batch(PageRowsBatch.concat(page_batches), rule_weight=0.4)
+
+    return all_page_meta, all_rows
+
+
 def process_document(
     doc_id: str,
     pages: dict[int, str],
@@ -58,23 +121,10 @@ def process_document(
     all_page_meta : List[PageMetadata]
         One PageMetadata entry per page.
     all_rows : List[LedgerRow]
-        All extracted ledger rows from all pages, with page_id filled in.
+        All extracted ledger rows from all pages, with page_id and
+        confidence scores filled in.
     """
 
-    all_page_meta: List[PageMetadata] = []
-    all_rows: List[LedgerRow] = []
-
-    # Sort pages by page_id so processing is deterministic
-    for page_id in sorted(pages.keys()):
-        page_text = pages[page_id]
-
-        page_meta, rows = process_single_page(
-            doc_id=doc_id,
-            page_id=page_id,
-            page_text=page_text,
-        )
+    all_page_meta, all_rows = process_document_batch(doc_id=doc_id, pages=pages)
 
-        all_page_meta.append(page_meta)
-        all_rows.extend(rows)
-
-    return all_page_meta, all_rows
+    return all_page_meta, all_rows.to_rows()
@@ -1,4 +1,8 @@
-from typing import TypedDict, Literal, Optional
+import math
+from dataclasses import dataclass, field
+from typing import Any, List, Literal, Optional, Sequence, TypedDict
+
+import numpy as np
 
 # -------------------------------
 # Transaction-level definitions
@@ -61,3 +65,210 @@ class PageMetadata(TypedDict):
 
     page_type: PageType
     financial_structure_overview: str
+
+
+# -------------------------------
+# Column-oriented row batches
+# -------------------------------
+
+# Column order of PageRowsBatch.numeric
+NUMERIC_FIELDS = ("pounds", "shillings", "pence")
+
+# Column order of PageRowsBatch.confs
+MODEL_CONF_FIELDS = (
+    "model_conf_description",
+    "model_conf_transaction_type",
+    "model_conf_pounds",
+    "model_conf_shillings",
+    "model_conf_pence",
+    "model_conf_pence_fraction",
+)
+
+
+def amount_to_float(value: Any) -> float:
+    """
+    Numeric LLM field -> float, with NaN for null / non-numeric values.
+
+    Non-finite values ("inf", "Infinity", "1e999", ...) also become NaN:
+    float() accepts them, but Excel cannot store them.
+    """
+    if value is None or isinstance(value, bool):
+        return math.nan
+    try:
+        amount = float(value)
+    except (TypeError, ValueError):
+        return math.nan
+    return amount if math.isfinite(amount) else math.nan
+
+
+def conf_to_float(value: Any) -> float:
+    """
+    Model confidence -> float, with 0.0 for inf / NaN.
+    Non-numeric values raise, as float() does.
+    """
+    conf = float(value)
+    return conf if math.isfinite(conf) else 0.0
+
+
+def _as_int_or_none(value: float) -> Optional[float]:
+    if math.isnan(value):
+        return None
+    return int(value) if value.is_integer() else value
+
+
+def _conf(value: float) -> float:
+    """
+    float32 confidence -> Python float, without float32 noise
+    (0.3 rather than 0.30000001192092896).
+    """
+    return round(value, 6)
+
+
+@dataclass
+class PageRowsBatch:
+    """
+    The same data as a list of LedgerRow, stored column-wise
+    (structure of arrays) so confidence scoring runs as NumPy operations
+    over contiguous blocks instead of a Python loop per row.
+
+    - numeric: (n, 3) float64, columns NUMERIC_FIELDS, NaN = missing.
+      float64 so amounts round-trip exactly (float32 turns 123456789 into
+      123456792 and 10.3 into 10.300000190734863).
+    - confs:   (n, 6) float32, columns MODEL_CONF_FIELDS
+
+    Batches are concatenated per document and only turned back into
+    LedgerRow dicts (to_rows) when the results are written out.
+    """
+
+    doc_ids: List[str] = field(default_factory=list)
+    page_ids: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    row_ids: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    descriptions: List[str] = field(default_factory=list)
+    tx_types: List[str] = field(default_factory=list)
+    pence_fractions: List[PenceFraction] = field(default_factory=list)
+    numeric: np.ndarray = field(
+        default_factory=lambda: np.zeros((0, len(NUMERIC_FIELDS)), dtype=np.float64)
+    )
+    confs: np.ndarray = field(
+        default_factory=lambda: np.zeros((0, len(MODEL_CONF_FIELDS)), dtype=np.float32)
+    )
+    rule_based_confidence: np.ndarray = field(
+        default_factory=lambda: np.zeros(0, dtype=np.float32)
+    )
+    row_confidence: np.ndarray = field(
+        default_factory=lambda: np.zeros(0, dtype=np.float32)
+    )
+
+    def __len__(self) -> int:
+        return len(self.descriptions)
+
+    @classmethod
+    def empty(cls, n: int) -> "PageRowsBatch":
+        """
+        Batch of n rows to be filled in place: amounts missing (NaN),
+        confidences 0.0, text fields "".
+        """
+        return cls(
+            doc_ids=[""] * n,
+            page_ids=np.zeros(n, dtype=np.int64),
+            row_ids=np.zeros(n, dtype=np.int64),
+            descriptions=[""] * n,
+            tx_types=["Unknown"] * n,
+            pence_fractions=[None] * n,
+            numeric=np.full((n, len(NUMERIC_FIELDS)), np.nan, dtype=np.float64),
+            confs=np.zeros((n, len(MODEL_CONF_FIELDS)), dtype=np.float32),
+            rule_based_confidence=np.zeros(n, dtype=np.float32),
+            row_confidence=np.zeros(n, dtype=np.float32),
+        )
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[LedgerRow]) -> "PageRowsBatch":
+        """
+        Build a batch from LedgerRow dicts (e.g. fallback rows).
+        """
+        n = len(rows)
+        numeric = np.full((n, len(NUMERIC_FIELDS)), np.nan, dtype=np.float64)
+        confs = np.zeros((n, len(MODEL_CONF_FIELDS)), dtype=np.float32)
+
+        for i, row in enumerate(rows):
+            numeric[i] = [amount_to_float(row.get(k)) for k in NUMERIC_FIELDS]
+            confs[i] = [conf_to_float(row.get(k) or 0.0) for k in MODEL_CONF_FIELDS]
+
+        return cls(
+            doc_ids=[row["doc_id"] for row in rows],
+            page_ids=np.array([row["page_id"] for row in rows], dtype=np.int64),
+            row_ids=np.array([row["row_id"] for row in rows], dtype=np.int64),
+            descriptions=[row["description"] for row in rows],
+            tx_types=[row["transaction_type"] for row in rows],
+            pence_fractions=[row["pence_fraction"] for row in rows],
+            numeric=numeric,
+            confs=confs,
+            rule_based_confidence=np.array(
+                [row.get("rule_based_confidence", 0.0) for row in rows],
+                dtype=np.float32,
+            ),
+            row_confidence=np.array(
+                [row.get("row_confidence", 0.0) for row in rows],
+                dtype=np.float32,
+            ),
+        )
+
+    @classmethod
+    def concat(cls, batches: Sequence["PageRowsBatch"]) -> "PageRowsBatch":
+        """
+        Stack several batches (e.g. all pages of a document) into one.
+        """
+        if not batches:
+            return cls()
+
+        return cls(
+            doc_ids=[x for b in batches for x in b.doc_ids],
+            page_ids=np.concatenate([b.page_ids for b in batches]),
+            row_ids=np.concatenate([b.row_ids for b in batches]),
+            descriptions=[x for b in batches for x in b.descriptions],
+            tx_types=[x for b in batches for x in b.tx_types],
+            pence_fractions=[x for b in batches for x in b.pence_fractions],
+            numeric=np.concatenate([b.numeric for b in batches]),
+            confs=np.concatenate([b.confs for b in batches]),
+            rule_based_confidence=np.concatenate(
+                [b.rule_based_confidence for b in batches]
+            ),
+            row_confidence=np.concatenate([b.row_confidence for b in batches]),
+        )
+
+    def to_rows(self) -> List[LedgerRow]:
+        """
+        Materialise the batch as LedgerRow dicts, with plain Python values
+        (missing amounts as None).
+        """
+        rows: List[LedgerRow] = []
+        numeric = self.numeric.tolist()
+        confs = self.confs.tolist()
+        rule_conf = self.rule_based_confidence.tolist()
+        row_conf = self.row_confidence.tolist()
+
+        for i in range(len(self)):
+            pounds, shillings, pence = numeric[i]
+            c = confs[i]
+            row: LedgerRow = {
+                "doc_id": self.doc_ids[i],
+                "page_id": int(self.page_ids[i]),
+                "row_id": int(self.row_ids[i]),
+                "description": self.descriptions[i],
+                "transaction_type": self.tx_types[i],  # type: ignore[typeddict-item]
+                "pounds": _as_int_or_none(pounds),  # type: ignore[typeddict-item]
+                "shillings": _as_int_or_none(shillings),  # type: ignore[typeddict-item]
+                "pence": _as_int_or_none(pence),  # type: ignore[typeddict-item]
+                "pence_fraction": self.pence_fractions[i],
+                "model_conf_description": _conf(c[0]),
+                "model_conf_transaction_type": _conf(c[1]),
+                "model_conf_pounds": _conf(c[2]),
+                "model_conf_shillings": _conf(c[3]),
+                "model_conf_pence": _conf(c[4]),
+                "model_conf_pence_fraction": _conf(c[5]),
+                "rule_based_confidence": _conf(rule_conf[i]),
+                "row_confidence": _conf(row_conf[i]),
+            }
+            rows.append(row)
+
+        return rows
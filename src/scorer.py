@@ -1,7 +1,10 @@
 # src/scorer.py
 
 from typing import Optional
-from .schema import LedgerRow  # type: ignore[import]
+
+import numpy as np
+
+from .schema import LedgerRow, PageRowsBatch  # type: ignore[import]
 
 
 def compute_rule_based_confidence(
@@ -109,3 +112,70 @@ def compute_row_confidence(
         combined = 1.0
 
     return combined
+
+
+
+def score_batch(
+    batch: PageRowsBatch,
+    rule_weight: float = 0.4,
+    typical_max_pounds: Optional[int] = None,
+) -> PageRowsBatch:
+    """
+    Vectorised version of compute_rule_based_confidence() and
+    compute_row_confidence() over a PageRowsBatch.
+
+    Applies exactly the same rules, but as NumPy operations over the
+    batch's columns instead of a Python loop per row. Fills in
+    batch.rule_based_confidence and batch.row_confidence and returns batch.
+    """
+
+    n = len(batch)
+    score = np.ones(n, dtype=np.float64)
+
+    # 1) Description length check
+    desc_len = np.fromiter(
+        (len((d or "").strip()) for d in batch.descriptions),
+        dtype=np.int64,
+        count=n,
+    )
+    score -= 0.4 * (desc_len == 0)
+    score -= 0.2 * ((desc_len > 0) & (desc_len < 3))
+
+    # 2) Numeric sanity checks (NaN = missing, not penalised here)
+    pounds, shillings, pence = batch.numeric.T
+    has_pounds = ~np.isnan(pounds)
+    has_shillings = ~np.isnan(shillings)
+    has_pence = ~np.isnan(pence)
+
+    # 2a) shillings should normally be 0–19
+    score -= 0.2 * (has_shillings & ~((shillings >= 0) & (shillings <= 19)))
+
+    # 2b) pence should normally be 0–11 (pre-decimal)
+    score -= 0.2 * (has_pence & ~((pence >= 0) & (pence <= 11)))
+
+    # 2c) pounds range sanity if we have a typical max
+    if typical_max_pounds is not None:
+        score -= 0.2 * (has_pounds & (pounds > typical_max_pounds * 3))
+
+    # 3) Transaction type check
+    bad_tx = np.fromiter(
+        (t not in ("Debit", "Credit", "Unknown") for t in batch.tx_types),
+        dtype=bool,
+        count=n,
+    )
+    score -= 0.3 * bad_tx
+
+    # 4) If all monetary fields are None, it's suspicious as a transaction row
+    score -= 0.3 * ~(has_pounds | has_shillings | has_pence)
+
+    rule_conf = np.clip(score, 0.0, 1.0)
+
+    # Average model confidence across the numeric + description fields
+    model_conf_avg = batch.confs.mean(axis=1)
+
+    rw = max(0.0, min(1.0, rule_weight))  # clamp rule_weight
+    combined = np.clip(rw * rule_conf + (1.0 - rw) * model_conf_avg, 0.0, 1.0)
+
+    batch.rule_based_confidence = rule_conf.astype(np.float32)
+    batch.row_confidence = combined.astype(np.float32)
+    return batch
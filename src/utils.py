@@ -1,10 +1,18 @@
 # src/utils.py
 
+import asyncio
 import os
-from typing import Optional
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Coroutine, Mapping, Optional, TypeVar
 
 from dotenv import load_dotenv  # make sure python-dotenv is installed
 
+T = TypeVar("T")
+
+# Matches the {{PLACEHOLDER}} markers used in prompts/*.txt
+_PLACEHOLDER_RE = re.compile(r"\{\{([A-Z_]+)\}\}")
+
 
 def load_env(dotenv_path: Optional[str] = None) -> None:
     """
@@ -28,3 +36,33 @@ def get_openai_api_key() -> str:
             "OPENAI_API_KEY is not set. Please add it to your .env file or environment."
         )
     return api_key
+
+
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Run a coroutine to completion from synchronous code.
+
+    Uses asyncio.run() normally. Inside an already-running event loop
+    (e.g. a Jupyter notebook) asyncio.run() is not allowed, so the
+    coroutine is run on a fresh loop in a helper thread instead.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
+def fill_prompt_template(template: str, values: Mapping[str, str]) -> str:
+    """
+    Replace every {{NAME}} in template with values["NAME"] in a single pass.
+
+    Placeholders without a value are left untouched, and substituted text is
+    never scanned again (so page text containing "{{...}}" is safe).
+    """
+    return _PLACEHOLDER_RE.sub(
+        lambda m: values.get(m.group(1), m.group(0)),
+        template,
+    )